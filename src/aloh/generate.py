@@ -1,8 +1,10 @@
 """Generate fake order volumes and prices."""
 
 from dataclasses import dataclass
-from random import choice, uniform
-from typing import List
+from random import choice, getrandbits, uniform
+from typing import List, Optional
+
+import numpy as np  # type: ignore
 
 __all__ = ["Price", "Volume", "generate_orders"]
 
@@ -36,24 +38,35 @@ class Volume:
         x = uniform(self.min_order, self.max_order)
         return rounds(x, self.round_to)
 
-
-def generate_volumes(total_volume: float, sizer: Volume) -> List[float]:
-    xs = []
-    remaining = total_volume
-    while remaining >= 0:
-        x = sizer.generate()
-        remaining = remaining - x
-        if remaining == 0:
-            xs.append(x)
-            break
-        elif remaining > 0:
-            xs.append(x)
-        else:
-            # добавить небольшой остаток, котрый выведет
-            # сумму *хs* на величину *total_volume*
-            xs.append(total_volume - sum(xs))
-            break
-    return xs
+    def generate_many(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """Сразу *n* объемов заказов, округленных как в *generate()*."""
+        xs = rng.uniform(self.min_order, self.max_order, size=n)
+        return np.round(xs / self.round_to) * self.round_to
+
+
+def generate_volumes(
+    total_volume: float, sizer: Volume, rng: Optional[np.random.Generator] = None
+) -> List[float]:
+    if rng is None:
+        # seed from *random*, so that random.seed() still fixes the result
+        rng = np.random.default_rng(getrandbits(64))
+    # оценка числа заказов с запасом, обычно хватает одной выборки
+    if sizer.min_order > 0:
+        n = int(total_volume / sizer.min_order) + 2
+    else:
+        # средний заказ не меньше половины *max_order*
+        n = int(2 * total_volume / sizer.max_order) + 2
+    xs = sizer.generate_many(n, rng)
+    while xs.sum() < total_volume:
+        xs = np.concatenate([xs, sizer.generate_many(n, rng)])
+    # первый заказ, на котором накопленная сумма достигает *total_volume*
+    cs = np.cumsum(xs)
+    i = np.searchsorted(cs, total_volume)
+    xs = xs[: i + 1]
+    # заменить последний заказ небольшим остатком, котрый выведет
+    # сумму *хs* на величину *total_volume*
+    xs[i] = total_volume - (cs[i - 1] if i else 0)
+    return xs.tolist()
 
 
 def generate_day(n_days: int) -> int:
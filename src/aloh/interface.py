@@ -2,6 +2,8 @@
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
+import numpy as np  # type: ignore
+
 from aloh.requirements import Materials
 
 
@@ -14,6 +16,39 @@ class Order:
     price: float
 
 
+@dataclass
+class OrderBatch:
+    """Orders of one product as parallel arrays of order parameters."""
+
+    day: np.ndarray
+    volume: np.ndarray
+    price: np.ndarray
+
+    @classmethod
+    def from_orders(cls, orders: List[Order]):
+        return cls(
+            day=np.array([o.day for o in orders], dtype=int),
+            volume=np.array([o.volume for o in orders]),
+            price=np.array([o.price for o in orders]),
+        )
+
+    def __len__(self):
+        return len(self.day)
+
+    def by_day(self, days: List[int]) -> List[np.ndarray]:
+        """Order numbers for each day in *days*.
+        Orders on days outside *days* are not listed.
+        """
+        ix = np.argsort(self.day, kind="stable")
+        sorted_days = self.day[ix]
+        starts = np.searchsorted(sorted_days, days, side="left")
+        ends = np.searchsorted(sorted_days, days, side="right")
+        return [ix[a:b] for a, b in zip(starts, ends)]
+
+    def as_dict(self):
+        return dict(day=self.day, volume=self.volume, price=self.price)
+
+
 @dataclass
 class Product:
     name: str
@@ -52,6 +87,10 @@ def order_dict(products):
     return {p.name: [Order(**abc) for abc in p.orders] for p in products}
 
 
+def order_batches(order_dict):
+    return {p: OrderBatch.from_orders(orders) for p, orders in order_dict.items()}
+
+
 def _max_day(order_dict):
     return max([order.day for orders in order_dict.values() for order in orders])
 
@@ -2,57 +2,60 @@
    This is the main module in 'aloh' package.
 """
 
+import os
 from dataclasses import dataclass
+from functools import lru_cache
 from time import perf_counter
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+import numpy as np  # type: ignore
 import pandas as pd
 import pulp
 
 import aloh.interface
-from aloh.interface import Product
+from aloh.interface import OrderBatch, Product
 from aloh.requirements import Materials
 
-# This is a dict of dicts that mimics a matrix.
-# We need this data structure to work with pulp.
-Matrix = Dict[str, Dict[int, float]]
+# This is a numpy object array of pulp variables and expressions
+# sized (number of products * number of days). Row i is product products[i].
+Matrix = np.ndarray
+
+# OptModel matrices reported after solve
+VARIABLES = ["prod", "ship", "req", "inv", "sales", "costs"]
 
 # Matrix manipulation and helpers
 
 
-def multiply(vec: Dict, mat: Matrix):
+def multiply(vec: np.ndarray, mat: Matrix):
     """Vector by matrix multiplication, results in a matrix."""
-    res = {}
-    for p in mat.keys():
-        res[p] = {}
-        m = vec[p]
-        for d in mat[p].keys():
-            res[p][d] = m * mat[p][d]
-    return res
+    return vec[:, None] * mat
 
 
 def lp_sum(mat: Matrix):
-    return pulp.lpSum([mat[p][d] for p in mat.keys() for d in mat[p].keys()])
+    """Sum all cells of a matrix into one expression, added in place."""
+    return pulp.LpAffineExpression().addInPlace(mat.ravel())
+
+
+def cell_value(x):
+    """Value of a matrix cell after solve.
+    Variables keep their solution in *varValue*, read it directly
+    and leave pulp.value() for expressions and numbers.
+    """
+    return x.varValue if isinstance(x, pulp.LpVariable) else pulp.value(x)
 
 
-def values(mat: Matrix):
-    res = {}
-    for p in mat.keys():
-        res[p] = {}
-        for d in mat[p].keys():
-            res[p][d] = pulp.value(mat[p][d])
-    return res
+def values(mat: Matrix) -> np.ndarray:
+    return np.vectorize(cell_value, otypes=[float])(mat)
 
 
-def values_to_list(mat: Matrix):
-    res = {}
-    for p in mat.keys():
-        res[p] = [pulp.value(x) for x in mat[p].values()]
-    return res
+def as_lists(arr: np.ndarray, products: List[str]):
+    """Rows of evaluated matrix as lists by product."""
+    return {p: row.tolist() for p, row in zip(products, arr)}
 
 
-def as_df(mat: Matrix):
-    return pd.DataFrame(values(mat))
+def as_df(arr: np.ndarray, products: List[str]):
+    """Evaluated matrix as (days * products) dataframe, a copy of *arr*."""
+    return pd.DataFrame(arr.T, columns=products, copy=True)
 
 
 # Orders
@@ -82,35 +85,46 @@ class Dim:
     products: [str]
     days: list
 
+    def __post_init__(self):
+        self.p_idx = {p: i for i, p in enumerate(self.products)}
+
     def empty_matrix(self):
-        return {p: {d: 0 for d in self.days} for p in self.products}
+        """Matrix of None values, every make_* method fills all of its cells."""
+        return np.empty((len(self.products), len(self.days)), dtype=object)
 
     def make_production(self, capacities):
         """Create a decision variable for production:
-        0 < prod[p][d] <  capacity[p],
-        where p is product and d is day.
+        0 < prod[i, d] <  capacity[p],
+        where p is product in row i and d is day.
         """
         prod = self.empty_matrix()
-        for p in self.products:
+        for i, p in enumerate(self.products):
             cap = capacities[p]
             for d in self.days:
-                prod[p][d] = pulp.LpVariable(f"Prod_{p}_{d}", lowBound=0, upBound=cap)
+                prod[i, d] = pulp.LpVariable(f"Prod_{p}_{d}", lowBound=0, upBound=cap)
         return prod
 
-    def make_shipment_sales(self, order_dict, accept_dict):
+    def make_shipment_sales(self, order_batches: Dict[str, OrderBatch], accept_dict):
         """Create expressions for:
         - shipment (volume of daily off-take)
         - sales (same in dollars).
         """
         ship = self.empty_matrix()
         sales = self.empty_matrix()
-        for p in self.products:
-            for i, order in enumerate(order_dict[p]):
-                for d in self.days:
-                    if order.day == d:
-                        a = accept_dict[p][i]
-                        ship[p][d] += a * order.volume
-                        sales[p][d] += a * order.volume * order.price
+        for i, p in enumerate(self.products):
+            batch = order_batches[p]
+            accept = accept_dict[p]
+            volumes = batch.volume.tolist()
+            revenues = (batch.volume * batch.price).tolist()
+            for d, ix in zip(self.days, batch.by_day(self.days)):
+                # (variable, coefficient) pairs for orders on day *d*,
+                # each accept variable appears only once
+                ix = ix.tolist()
+                xs = [accept[k] for k in ix]
+                ship[i, d] = pulp.LpAffineExpression(zip(xs, [volumes[k] for k in ix]))
+                sales[i, d] = pulp.LpAffineExpression(
+                    zip(xs, [revenues[k] for k in ix])
+                )
         return ship, sales
 
     def make_requirements(self, ship, ms: Materials):
@@ -121,18 +135,20 @@ class Dim:
         # Assumption: all needed products will be produced on the same day.
         #
         req = self.empty_matrix()
-        f = ms.requirements_factory()
-        # iterate over all products
-        for p in self.products:
-            # get full requirements for particular product
-            req_dict = f(p)
+        # full requirements matrix, calculated once:
+        # R[i, j] units of product j are needed for unit of product i
+        R = ms.R.loc[self.products, self.products].to_numpy()
+        # iterate over products that are required
+        for j in range(len(self.products)):
+            # products that require product j, skip zero requirements
+            users = [(i, R[i, j].item()) for i in np.flatnonzero(R[:, j])]
             # iterate over days
             for d in self.days:
-                # transmit requirements for each product
-                for p2, r in req_dict.items():
-                    # if requirement is zero - do nothing
-                    if r:
-                        req[p2][d] += r * ship[p][d]
+                expr = pulp.LpAffineExpression()
+                for i, r in users:
+                    for v, x in ship[i, d].items():
+                        expr.addterm(v, r * x)
+                req[j, d] = expr
         return req
 
     def calculate_inventory(self, prod, use):
@@ -140,16 +156,46 @@ class Dim:
         Inventory is end of day stock of produced, but not shipped goods.
         """
         inv = self.empty_matrix()
-        for p in self.products:
-            xs = prod[p]
-            ys = use[p]
+        for i in range(len(self.products)):
+            # single pass: inv[d] = inv[d-1] + prod[d] - use[d]
+            running = pulp.LpAffineExpression()
             for d in self.days:
-                inv[p][d] = accum(xs, d) - accum(ys, d)
+                running.addInPlace(prod[i, d])
+                running.subInPlace(use[i, d])
+                inv[i, d] = pulp.LpAffineExpression(running)
         return inv
 
 
-def accum(var, i):
-    return pulp.lpSum([var[k] for k in range(i + 1)])
+# Command line solvers exchange model and solution files with pulp,
+# keep these files in memory if there is a RAM disk.
+RAM_DISK = "/dev/shm"
+
+
+@lru_cache(maxsize=None)
+def available_solvers():
+    """Solvers installed on this machine, checked once per session."""
+    return tuple(pulp.listSolvers(onlyAvailable=True))
+
+
+def make_solver(threads: int, warm_start: bool = False):
+    """Prefer solvers called through Python API (Gurobi, HiGHS, CoinMP),
+    they do not write the model to a file. Fall back to bundled CBC
+    with temporary files on RAM disk.
+
+    With *warm_start* Gurobi and CBC start from current variable values.
+    """
+    available = available_solvers()
+    if "GUROBI" in available:
+        return pulp.GUROBI(msg=False, warmStart=warm_start, Threads=threads)
+    if "HiGHS" in available:
+        # HiGHS API appears in pulp 2.8
+        return pulp.getSolver("HiGHS", msg=False, threads=threads)
+    if "COINMP_DLL" in available:
+        return pulp.COINMP_DLL(msg=False)
+    solver = pulp.PULP_CBC_CMD(msg=False, threads=threads, warmStart=warm_start)
+    if os.path.isdir(RAM_DISK) and os.access(RAM_DISK, os.W_OK):
+        solver.tmpDir = RAM_DISK
+    return solver
 
 
 def clean(s: str):
@@ -158,17 +204,25 @@ def clean(s: str):
 
 class OptModel:
     def __init__(
-        self, products: List[Product], model_name: str, inventory_weight: float
+        self,
+        products: List[Product],
+        model_name: str,
+        inventory_weight: float,
+        threads: Optional[int] = None,
     ):
         # model parameters
         self.inventory_weight = inventory_weight
         self.time_elapsed = 0
+        self._solution = None
+        # solver threads, all available CPUs by default
+        self.threads = threads or os.cpu_count()
 
         #  plant and order parameters
         self.products = aloh.interface.names(products)
         self.capacities = aloh.interface.capacities(products)
         self.unit_costs = aloh.interface.unit_costs(products)
         self.order_dict = aloh.interface.order_dict(products)
+        self.order_batches = aloh.interface.order_batches(self.order_dict)
         self.days = aloh.interface.days(self.order_dict)
         self.storage_days = aloh.interface.storage_days(
             products, max_allowed_storage_days=self.n_days
@@ -177,10 +231,12 @@ class OptModel:
         # LP model
         self.accept_dict = make_accept_dict(self.order_dict)
         dim = Dim(self.products, self.days)
+        self.p_idx = dim.p_idx
         self.prod = dim.make_production(self.capacities)
-        self.costs = multiply(self.unit_costs, self.prod)
+        unit_costs = np.array([self.unit_costs[p] for p in self.products])
+        self.costs = multiply(unit_costs, self.prod)
         self.ship, self.sales = dim.make_shipment_sales(
-            self.order_dict, self.accept_dict
+            self.order_batches, self.accept_dict
         )
         self.ms = aloh.interface.get_materials(products)
         self.req = dim.make_requirements(self.ship, self.ms)
@@ -193,33 +249,37 @@ class OptModel:
 
     def set_objective(self):
         # Целевая функция
-        self.model += (
-            lp_sum(self.sales)
-            - lp_sum(self.costs)
-            - lp_sum(self.inv) * self.inventory_weight
-        )
+        objective = lp_sum(self.sales)
+        objective.subInPlace(lp_sum(self.costs))
+        objective.subInPlace(lp_sum(self.inv) * self.inventory_weight)
+        self.model += objective
 
     def set_non_negative_inventory(self):
         """Ограничение: неотрицательные запасы."""
-        for p in self.products:
+        # numeric right-hand side, no 'inv - 0' copy as in 'inv >= 0'
+        for i, p in enumerate(self.products):
             for d in self.days:
-                self.model += (self.inv[p][d] >= 0, f"Non_negative_inventory_{p}_{d}")
+                c = pulp.LpConstraint(self.inv[i, d], pulp.LpConstraintGE, rhs=0)
+                self.model.addConstraint(c, f"Non_negative_inventory_{p}_{d}")
 
     def set_closed_sum(self):
         """Ограничение: закрытая сумма, нулевые входящие и исходящие остатки."""
-        for p in self.products:
-            self.model += (
-                pulp.lpSum(self.prod[p]) == pulp.lpSum(self.req[p]),
-                f"Closed sum for {p}",
-            )
+        for i, p in enumerate(self.products):
+            # sum(prod) - sum(req) == 0, right-hand side passed as a number
+            terms = ((x, 1) for x in self.prod[i])
+            c = pulp.LpConstraint(terms, pulp.LpConstraintEQ, rhs=0)
+            c.subInPlace(self.req[i])
+            self.model += (c, f"Closed sum for {p}")
 
     def set_storage_limit(self):
         """Ввести ограничение на срок складирования продукта."""
-        for p in self.products:
+        for i, p in enumerate(self.products):
             s = self.storage_days[p]
             for d in self.days:
-                xs = next_use(self.ship[p], d, s)
-                self.model += self.inv[p][d] <= pulp.lpSum(xs)
+                xs = next_use(self.ship[i], d, s)
+                # inv - sum(xs) <= 0
+                c = pulp.LpConstraint(self.inv[i, d], pulp.LpConstraintLE, rhs=0)
+                self.model += c.subInPlace(xs)
 
     def evaluate(self):
         self.set_objective()
@@ -229,14 +289,44 @@ class OptModel:
         self.solve()
         return self.accepted_orders(), self.estimated_production()
 
-    def solve(self):
+    def resolve(self, capacities: Optional[Dict[str, float]] = None):
+        """Solve model again with new *capacities* for some products.
+        Only upper bounds of production variables are changed, previous
+        solution is passed to solver as a starting point.
+        """
+        capacities = capacities or {}
+        unknown = [p for p in capacities if p not in self.p_idx]
+        if unknown:
+            raise KeyError(f"Unknown products: {unknown}")
+        for p, cap in capacities.items():
+            self.capacities[p] = cap
+            for x in self.prod[self.p_idx[p]]:
+                x.upBound = cap
+        self.solve(warm_start=True)
+        return self.accepted_orders(), self.estimated_production()
+
+    def solve(self, warm_start: bool = False):
         start = perf_counter()
-        self.model.solve()
+        self.model.solve(make_solver(self.threads, warm_start))
         self.time_elapsed = perf_counter() - start
+        self._solution = None
         print("Solved in {:.3f} sec".format(self.time_elapsed))
 
+    @property
+    def solution(self) -> Dict[str, np.ndarray]:
+        """Values of matrices in VARIABLES, evaluated once after solve.
+        Arrays are read-only, reports work on copies.
+        """
+        if self._solution is None:
+            self._solution = {}
+            for key in VARIABLES:
+                arr = values(self.__getattribute__(key))
+                arr.setflags(write=False)
+                self._solution[key] = arr
+        return self._solution
+
     def estimated_production(self):
-        return values_to_list(self.prod)
+        return as_lists(self.solution["prod"], self.products)
 
     def accepted_orders(self) -> Dict[str, int]:
         return {p: [as_int(x) for x in self.accept_dict[p]] for p in self.products}
@@ -251,19 +341,17 @@ class OptModel:
 
 def as_int(x):
     try:
-        return int(x.value())
+        return int(x.varValue)
     except TypeError:
         return 0
 
 
 def next_use(xs, d, s):
-    """Slice *xs* list between *d* and *d+s* properly."""
-    if s == 0:
-        return 0
-    else:
-        last = len(xs) - 1
-        up_to = min(last, d + s) + 1
-        return [xs[t] for t in range(d + 1, up_to)]
+    """Slice *xs* row between *d* and *d+s* properly.
+    This is a numpy view, no list is built. Slice is empty if *s* is 0
+    and stops at the last day if *d+s* is beyond it.
+    """
+    return xs[d + 1 : d + s + 1]
 
 
 # Data frame functions - report what is inside model
@@ -280,31 +368,23 @@ def accepted_orders_full(m: OptModel):
 
 
 def orders_dataframe(p: str, m: OptModel):
-    df = pd.DataFrame(m.order_dict[p])
+    df = pd.DataFrame(m.order_batches[p].as_dict())
     df["accept"] = m.accepted_orders()[p]
     df.index.name = "n"
     return df
 
 
-def series(var, p: str):
-    return values(var)[p].values()
-
-
 def product_dataframe(p: str, m: OptModel):
-    df = pd.DataFrame()
-    df["x"] = series(m.prod, p)
-    df["ship"] = series(m.ship, p)
-    df["req"] = series(m.req, p)
-    df["inv"] = series(m.inv, p)
-    df["sales"] = series(m.sales, p)
-    df["costs"] = series(m.costs, p)
+    i = m.p_idx[p]
+    # one (days * variables) array, one dataframe
+    arr = np.column_stack([m.solution[key][i] for key in VARIABLES])
+    df = pd.DataFrame(arr, columns=["x"] + VARIABLES[1:])
     df.index.name = "day"
     return df
 
 
 def variable_dataframes(m: OptModel):
-    keys = ["prod", "ship", "req", "inv", "sales", "costs"]
-    return [as_df(m.__getattribute__(key)) for key in keys]
+    return [as_df(m.solution[key], m.products) for key in VARIABLES]
 
 
 @dataclass
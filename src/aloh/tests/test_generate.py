@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from aloh.generate import Volume, generate_volumes
+
+
+def test_generate_volumes_add_up_to_total():
+    sizer = Volume(min_order=20, max_order=60, round_to=5)
+    xs = generate_volumes(1000, sizer, np.random.default_rng(0))
+    assert sum(xs) == 1000
+    assert all(0 < x <= 60 for x in xs)
+    assert all(x % 5 == 0 for x in xs[:-1])
+
+
+def test_generate_volumes_zero_total():
+    assert generate_volumes(0, Volume(10, 20)) == [0]
+
+
+def test_generate_volumes_fractional_orders_in_one_sample(monkeypatch):
+    calls = []
+    generate_many = Volume.generate_many
+
+    def counted(self, n, rng):
+        calls.append(n)
+        return generate_many(self, n, rng)
+
+    monkeypatch.setattr(Volume, "generate_many", counted)
+    sizer = Volume(min_order=0.1, max_order=0.2, round_to=0.01)
+    xs = generate_volumes(1000, sizer, np.random.default_rng(0))
+    assert sum(xs) == pytest.approx(1000)
+    assert len(calls) == 1
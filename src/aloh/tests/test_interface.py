@@ -1,4 +1,4 @@
-from aloh.interface import Product
+from aloh.interface import Order, OrderBatch, Product
 
 pa = Product("A")
 pa.capacity = 100
@@ -40,3 +40,15 @@ def test_pb():
         orders=[dict(day=2, volume=49, price=0.3)],
         requires={},
     )
+
+
+def test_order_batch_by_day():
+    orders = [Order(2, 10, 0.5), Order(0, 20, 0.4), Order(2, 30, 0.6)]
+    batch = OrderBatch.from_orders(orders)
+    assert len(batch) == 3
+    assert [ix.tolist() for ix in batch.by_day([0, 1, 2])] == [[1], [], [0, 2]]
+
+
+def test_order_batch_by_day_skips_days_outside_horizon():
+    batch = OrderBatch.from_orders([Order(-1, 5, 1), Order(1, 5, 1), Order(7, 5, 1)])
+    assert [ix.tolist() for ix in batch.by_day([0, 1, 2])] == [[], [1], []]
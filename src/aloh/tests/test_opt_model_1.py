@@ -1,3 +1,7 @@
+from dataclasses import replace
+
+import pytest
+
 from aloh.interface import Product
 from aloh.small import OptModel
 
@@ -67,6 +71,28 @@ def test_model_with_storage_constraint():
     }
 
 
+def test_resolve_with_new_capacity():
+    om = OptModel([pa, pb], model_name="Resolve", inventory_weight=0.1)
+    om.evaluate()
+    expected = OptModel(
+        [replace(pa, capacity=200), pb],
+        model_name="Resolve_expected",
+        inventory_weight=0.1,
+    ).evaluate()
+    assert om.resolve(capacities={"A": 200}) == expected
+    assert om.capacities["A"] == 200
+
+
+def test_resolve_with_unknown_product_changes_nothing():
+    om = OptModel([pa, pb], model_name="Resolve_unknown", inventory_weight=0.1)
+    om.evaluate()
+    capacities = dict(om.capacities)
+    with pytest.raises(KeyError, match="'a'"):
+        om.resolve(capacities={"A": 200, "a": 5})
+    assert om.capacities == capacities
+    assert all(x.upBound == pa.capacity for x in om.prod[om.p_idx["A"]])
+
+
 if __name__ == "__main__":
     test_model_no_storage_constraint()
     test_model_with_storage_constraint()
@@ -1,3 +1,5 @@
+from dataclasses import replace
+
 from aloh import DataframeViewer, OptModel, Product
 
 pa = Product(name="A", capacity=10, unit_cost=0.1, storage_days=1)
@@ -33,3 +35,19 @@ def test_1():
         "sales": {0: 2.1, 1: 0.0, 2: 3.0},
         "costs": {0: 0.7, 1: 0.2, 2: 1.0},
     }
+
+
+def test_single_thread_solve_gives_same_result():
+    m1 = OptModel(products=[pa], model_name="model_0_1", inventory_weight=0, threads=1)
+    assert m1.evaluate() == (ac, xs)
+
+
+def test_save_product_name_with_space(tmp_path):
+    px = replace(pa, name="A x", orders=list(pa.orders))
+    m2 = OptModel(products=[px], model_name="model 0 2", inventory_weight=0)
+    assert m2.evaluate() == ({"A x": ac["A"]}, {"A x": xs["A"]})
+    filename = tmp_path / "model.lp"
+    m2.save(str(filename))
+    text = filename.read_text()
+    assert "Non_negative_inventory_A_x_0:" in text
+    assert "A x" not in text
@@ -77,6 +77,20 @@ def test_estimated_production():
     assert m.estimated_production() == {"A": [55, 0, 55], "B": [0, 100, 200]}
 
 
+def test_solution_is_evaluated_once():
+    assert m.solution is m.solution
+    assert m.solution["prod"].tolist() == [[55, 0, 55], [0, 100, 200]]
+
+
+def test_editing_report_keeps_solution():
+    prod_df = dv.inspect_variables()[0]
+    prod_df.iloc[0, 0] = 999
+    prod_df["A"] *= 2
+    dv.product_dataframes()["A"]["x"] *= 2
+    assert m.estimated_production() == {"A": [55, 0, 55], "B": [0, 100, 200]}
+    assert not m.solution["prod"].flags.writeable
+
+
 def test_accepted_orders():
     assert m.accepted_orders() == ac
     assert m.accepted_orders() == {"A": [1, 0, 1, 0], "B": [0, 1, 1]}